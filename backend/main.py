@@ -4,45 +4,77 @@ AI Viva Interview Platform - Main FastAPI Application
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 import uvicorn
+import asyncio
+import os
 
 from routers import interview
 from services.stt_service import STTService
 from services.tts_service import TTSService
 from services.llm_service import LLMService
+from services.eval_service import EvalService
 
 
 # Global service instances
 stt_service = None
 tts_service = None
 llm_service = None
+eval_service = None
+
+
+def _load_llm():
+    """Load the LLM and its knowledge base (built on first boot)"""
+    llm_service.load_model()
+    llm_service.load_knowledge_base()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize services on startup, cleanup on shutdown"""
-    global stt_service, tts_service, llm_service
+    global stt_service, tts_service, llm_service, eval_service
     
     print("🚀 Initializing AI services...")
     
-    # Initialize services (will be implemented)
-    # stt_service = STTService()
-    # tts_service = TTSService()
-    # llm_service = LLMService()
+    # Initialize services
+    stt_service = STTService()
+    tts_service = TTSService(reference_audio_path=os.getenv("PROFESSOR_AUDIO_PATH"))
+    llm_service = LLMService()
+    eval_service = EvalService()
+    
+    # Load every model up front, in parallel worker threads, so no request
+    # pays a cold load and the event loop is never blocked by one
+    await asyncio.gather(
+        asyncio.to_thread(stt_service.load_model),
+        tts_service.load_model_async(),
+        asyncio.to_thread(_load_llm),
+        asyncio.to_thread(eval_service.load_model)
+    )
+    
+    # Exposed to routers through the app state
+    app.state.stt_service = stt_service
+    app.state.tts_service = tts_service
+    app.state.llm_service = llm_service
+    app.state.eval_service = eval_service
+    
+    # Keep the in-memory session store from accumulating stale sessions
+    prune_task = asyncio.create_task(interview.prune_sessions_periodically(llm_service))
     
     print("✅ Services ready!")
     
     yield
     
     print("👋 Shutting down services...")
+    prune_task.cancel()
 
 
 app = FastAPI(
     title="AI Viva Interview Platform",
     description="Practice DSA interviews with AI-powered voice conversations",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS for frontend
@@ -71,7 +103,8 @@ async def health_check():
         "services": {
             "stt": stt_service is not None,
             "tts": tts_service is not None,
-            "llm": llm_service is not None
+            "llm": llm_service is not None,
+            "eval": eval_service is not None
         }
     }
 
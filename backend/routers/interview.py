@@ -2,14 +2,26 @@
 Interview Router - API endpoints for interview sessions
 """
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Request
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Dict, List, Literal
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import asyncio
+import orjson
+import re
+import time
 import uuid
+import os
 
 router = APIRouter()
 
 
+SCORE_FIELDS = ("technical_accuracy", "clarity", "depth", "confidence", "communication", "overall")
+SUBJECTS = ("DSA",)  # Subjects the interviewer has a knowledge base for
+
+
 class InterviewSession(BaseModel):
     id: str
     subject: str = "DSA"
@@ -18,24 +30,240 @@ class InterviewSession(BaseModel):
 
 
 class StartInterviewRequest(BaseModel):
-    subject: str = "DSA"
+    subject: Literal[SUBJECTS] = "DSA"
     difficulty: str = "medium"
 
 
+SESSION_STATUSES = ("pending", "active", "completed", "disconnected")
+FINISHED_STATUSES = tuple(SESSION_STATUSES.index(status) for status in ("completed", "disconnected"))
+
+
+class SessionStore:
+    """
+    In-memory session storage laid out as a structure of arrays.
+    Numeric score fields live in one matrix so aggregates are single NumPy calls.
+    Bounded LRU: finished sessions are evicted oldest-first once full, and
+    idle sessions of any status are pruned (active ones after a longer TTL).
+    """
+    
+    def __init__(self, max_sessions: int = 1024):
+        """
+        Initialize the store.
+        
+        Args:
+            max_sessions: Number of sessions kept before finished ones are evicted
+                (active sessions are never evicted; arrays grow if all are active)
+        """
+        self.max_sessions = max_sessions
+        self.id_to_row: "OrderedDict[str, int]" = OrderedDict()  # Least recently used first
+        self.score_matrix = np.zeros((max_sessions, len(SCORE_FIELDS)), dtype=np.float64)
+        self.scored = np.zeros(max_sessions, dtype=bool)
+        self.status = np.zeros(max_sessions, dtype=np.uint8)  # Index into SESSION_STATUSES
+        self.subject = np.zeros(max_sessions, dtype=np.uint8)  # Index into SUBJECTS
+        self.last_seen = np.zeros(max_sessions, dtype=np.float64)  # time.monotonic()
+        self._free_rows: List[int] = list(range(max_sessions - 1, -1, -1))
+        
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.id_to_row
+        
+    def __len__(self) -> int:
+        return len(self.id_to_row)
+        
+    def _grow(self):
+        """Double the capacity of every per-session array"""
+        extra = len(self.status)
+        self.score_matrix = np.concatenate([self.score_matrix, np.zeros_like(self.score_matrix)])
+        self.scored = np.concatenate([self.scored, np.zeros(extra, dtype=bool)])
+        self.status = np.concatenate([self.status, np.zeros(extra, dtype=np.uint8)])
+        self.subject = np.concatenate([self.subject, np.zeros(extra, dtype=np.uint8)])
+        self.last_seen = np.concatenate([self.last_seen, np.zeros(extra, dtype=np.float64)])
+        self._free_rows.extend(range(2 * extra - 1, extra - 1, -1))
+        
+    def _touch(self, session_id: str) -> int:
+        """Mark a session as recently used and return its row"""
+        self.id_to_row.move_to_end(session_id)
+        row = self.id_to_row[session_id]
+        self.last_seen[row] = time.monotonic()
+        return row
+        
+    def touch(self, session_id: str):
+        """Record activity on a session so it isn't pruned as idle"""
+        self._touch(session_id)
+        
+    def _evict_oldest_finished(self) -> Optional[str]:
+        """Evict the least recently used completed/disconnected session, returning its ID"""
+        for session_id, row in self.id_to_row.items():
+            if self.status[row] in FINISHED_STATUSES:
+                self.remove(session_id)
+                return session_id
+        return None
+        
+    def add(self, session_id: str, subject: str = "DSA", status: str = "pending") -> List[str]:
+        """
+        Register a new session.
+        
+        Returns:
+            IDs of sessions evicted to make room
+        """
+        # Resolve codes first so a bad value can't leave a half-registered session
+        status_code = SESSION_STATUSES.index(status)
+        subject_code = SUBJECTS.index(subject)
+        
+        evicted = []
+        if len(self.id_to_row) >= self.max_sessions:
+            evicted_id = self._evict_oldest_finished()
+            if evicted_id is not None:
+                evicted.append(evicted_id)
+        if not self._free_rows:
+            self._grow()
+            
+        row = self._free_rows.pop()
+        self.score_matrix[row] = 0
+        self.scored[row] = False
+        self.status[row] = status_code
+        self.subject[row] = subject_code
+        self.last_seen[row] = time.monotonic()
+        self.id_to_row[session_id] = row  # Only once every array holds the session
+        return evicted
+        
+    def remove(self, session_id: str):
+        """Drop a session and recycle its row"""
+        row = self.id_to_row.pop(session_id)
+        self.scored[row] = False
+        self._free_rows.append(row)
+        
+    def prune(self, max_idle_seconds: float, max_active_idle_seconds: float) -> List[str]:
+        """
+        Remove sessions that have been idle for too long.
+        
+        Args:
+            max_idle_seconds: Idle limit for completed/disconnected sessions
+            max_active_idle_seconds: Idle limit for pending/active sessions (e.g. a
+                client that called /start but never connected)
+        
+        Returns:
+            IDs of the removed sessions
+        """
+        rows = np.fromiter(self.id_to_row.values(), dtype=np.intp, count=len(self.id_to_row))
+        finished = np.isin(self.status[rows], FINISHED_STATUSES)
+        idle = time.monotonic() - self.last_seen[rows]
+        stale = np.where(finished, idle > max_idle_seconds, idle > max_active_idle_seconds)
+        session_ids = list(self.id_to_row)
+        removed = [session_ids[i] for i in np.flatnonzero(stale)]
+        for session_id in removed:
+            self.remove(session_id)
+        return removed
+        
+    def set_status(self, session_id: str, status: str):
+        self.status[self._touch(session_id)] = SESSION_STATUSES.index(status)
+        
+    def set_scores(self, session_id: str, scores: Dict[str, float]):
+        """Write all score dimensions for a session in one row assignment"""
+        row = self._touch(session_id)
+        self.score_matrix[row] = np.array([scores[field] for field in SCORE_FIELDS])
+        self.scored[row] = True
+        
+    def get(self, session_id: str) -> InterviewSession:
+        """Materialize a session as its API model"""
+        row = self._touch(session_id)
+        score = None
+        if self.scored[row]:
+            score = dict(zip(SCORE_FIELDS, self.score_matrix[row].tolist()))
+            
+        return InterviewSession(
+            id=session_id,
+            subject=SUBJECTS[self.subject[row]],
+            status=SESSION_STATUSES[self.status[row]],
+            score=score
+        )
+        
+    def average_scores(self) -> Optional[Dict[str, float]]:
+        """Average every score dimension over all scored sessions"""
+        if not self.scored.any():
+            return None
+        averages = self.score_matrix[self.scored].mean(axis=0)
+        return dict(zip(SCORE_FIELDS, averages.round(1).tolist()))
+
+
 # In-memory session storage (will be replaced with DB)
-sessions = {}
+sessions = SessionStore()
+
+
+def _release_sessions(llm_service, session_ids: List[str]):
+    """Free the LLM chains and memories of sessions dropped from the store"""
+    for session_id in session_ids:
+        llm_service.end_session(session_id)
+
+
+async def prune_sessions_periodically(
+    llm_service,
+    interval_seconds: float = 300,
+    max_idle_seconds: float = 3600,
+    max_active_idle_seconds: float = 4 * 3600
+):
+    """Background task: periodically drop sessions that have gone idle"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        removed = sessions.prune(max_idle_seconds, max_active_idle_seconds)
+        _release_sessions(llm_service, removed)
+        if removed:
+            print(f"🧹 Pruned {len(removed)} idle sessions")
+
+# Sentence boundary: a terminator followed by whitespace (so "3.14" isn't split)
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+# Blocking STT inference runs here so one session can't stall the event loop
+_WORKER_POOL = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+
+async def _run_blocking(func, *args):
+    """Run a blocking call on the worker pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_WORKER_POOL, func, *args)
+
+
+async def _send_json(websocket: WebSocket, payload: dict):
+    """Send a control message encoded with orjson (binary frames are reserved for audio)"""
+    await websocket.send_text(orjson.dumps(payload).decode())
+
+
+async def _speak(websocket: WebSocket, tts_service, text: str):
+    """Send a sentence of the reply as text, then as professor voice audio"""
+    await _send_json(websocket, {"type": "response_text", "text": text})
+    
+    if tts_service.reference_audio_path is None:
+        return
+        
+    async for chunk in tts_service.synthesize_stream_async(text):
+        await websocket.send_bytes(chunk)
+
+
+async def _stream_reply(websocket: WebSocket, llm_service, tts_service, session_id: str, text: str):
+    """Speak the LLM reply sentence by sentence while it is still being generated"""
+    reply = ""
+    pending = ""
+    
+    async for token in llm_service.generate_response(session_id, text):
+        reply += token
+        pending += token
+        *sentences, pending = _SENTENCE_BOUNDARY.split(pending)
+        for sentence in sentences:
+            if sentence.strip():
+                await _speak(websocket, tts_service, sentence.strip())
+            
+    if pending.strip():
+        await _speak(websocket, tts_service, pending.strip())
+        
+    await _send_json(websocket, {"type": "response", "text": reply.strip()})
 
 
 @router.post("/start")
-async def start_interview(request: StartInterviewRequest):
+async def start_interview(request: StartInterviewRequest, http_request: Request):
     """Start a new interview session"""
     session_id = str(uuid.uuid4())
     
-    sessions[session_id] = InterviewSession(
-        id=session_id,
-        subject=request.subject,
-        status="active"
-    )
+    evicted = sessions.add(session_id, subject=request.subject, status="active")
+    _release_sessions(http_request.app.state.llm_service, evicted)
     
     return {
         "session_id": session_id,
@@ -50,29 +278,38 @@ async def get_session(session_id: str):
     if session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    return sessions[session_id]
+    return sessions.get(session_id)
+
+
+@router.get("/stats")
+async def get_stats():
+    """Get average scores across all scored interview sessions"""
+    return {
+        "scored_sessions": int(sessions.scored.sum()),
+        "average_scores": sessions.average_scores()
+    }
 
 
 @router.post("/end/{session_id}")
-async def end_interview(session_id: str):
+async def end_interview(session_id: str, http_request: Request):
     """End an interview session and get final score"""
     if session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session = sessions[session_id]
-    session.status = "completed"
+    sessions.set_status(session_id, "completed")
+    http_request.app.state.stt_service.reset_stream(session_id)
     
     # TODO: Calculate final score using ML model
-    session.score = {
+    sessions.set_scores(session_id, {
         "technical_accuracy": 0,
         "clarity": 0,
         "depth": 0,
         "confidence": 0,
         "communication": 0,
         "overall": 0
-    }
+    })
     
-    return session
+    return sessions.get(session_id)
 
 
 @router.websocket("/ws/{session_id}")
@@ -84,9 +321,13 @@ async def interview_websocket(websocket: WebSocket, session_id: str):
         await websocket.close(code=4004, reason="Session not found")
         return
     
+    stt_service = websocket.app.state.stt_service
+    tts_service = websocket.app.state.tts_service
+    llm_service = websocket.app.state.llm_service
+    
     try:
         # Send welcome message
-        await websocket.send_json({
+        await _send_json(websocket, {
             "type": "system",
             "message": "Connected to interview session",
             "session_id": session_id
@@ -95,20 +336,44 @@ async def interview_websocket(websocket: WebSocket, session_id: str):
         while True:
             # Receive audio data from client
             data = await websocket.receive_bytes()
+            if session_id in sessions:
+                sessions.touch(session_id)  # Connected sessions stay fresh while in use
             
-            # TODO: Process audio through pipeline
-            # 1. STT: Convert audio to text
-            # 2. LLM: Generate response with RAG
-            # 3. TTS: Convert response to professor voice
-            # 4. Send audio back
-            
-            # Placeholder response
-            await websocket.send_json({
+            await _send_json(websocket, {
                 "type": "processing",
                 "message": "Audio received, processing..."
             })
             
+            try:
+                # 1. STT: Convert audio to text
+                text, confidence = await _run_blocking(stt_service.transcribe, data)
+                stt_service.reset_stream(session_id)  # A full utterance ends any partial stream
+                if not text:
+                    continue
+                    
+                await _send_json(websocket, {
+                    "type": "transcript",
+                    "text": text,
+                    "confidence": confidence
+                })
+                
+                # 2-4. LLM tokens are spoken by TTS as each sentence completes
+                await _stream_reply(websocket, llm_service, tts_service, session_id, text)
+                
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:
+                # A failed turn (LLM unreachable, TTS error, ...) shouldn't end the interview
+                print(f"❌ Error in session {session_id}: {e}")
+                await _send_json(websocket, {
+                    "type": "error",
+                    "message": "Failed to process your answer, please try again"
+                })
+            
     except WebSocketDisconnect:
         print(f"Client disconnected from session {session_id}")
-        if session_id in sessions:
-            sessions[session_id].status = "disconnected"
+    finally:
+        stt_service.reset_stream(session_id)  # Drop any streaming STT buffer for the session
+        # Covers disconnects and unexpected errors alike; /end may have completed it already
+        if session_id in sessions and sessions.get(session_id).status == "active":
+            sessions.set_status(session_id, "disconnected")
@@ -2,11 +2,18 @@
 Evaluation Service - ML model for scoring viva responses
 """
 
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
-import torch
-from typing import Dict, List, Optional
+from transformers import AutoConfig, AutoTokenizer
+from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+from optimum.onnxruntime.configuration import AutoQuantizationConfig
+import os
+from typing import Dict, List, Optional, Iterable, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
+import ahocorasick
 import numpy as np
+import math
+import zlib
+import string
 
 
 @dataclass
@@ -21,6 +28,92 @@ class EvaluationScore:
     feedback: str
 
 
+def _build_automaton(keywords: Iterable[str]) -> ahocorasick.Automaton:
+    """Compile keywords into an Aho-Corasick automaton for single-pass matching"""
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        # Duplicate keywords are kept as a count so each still scores
+        _, count = automaton.get(keyword, (keyword, 0))
+        automaton.add_word(keyword, (keyword, count + 1))
+    automaton.make_automaton()
+    return automaton
+
+
+@lru_cache(maxsize=1024)
+def _lower_concepts(concepts: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Lowercased expected concepts, cached per question's concept list"""
+    return tuple(concept.lower() for concept in concepts)
+
+
+@lru_cache(maxsize=1024)
+def _concept_automaton(concepts: Tuple[str, ...]) -> ahocorasick.Automaton:
+    """Automaton for lowercased expected concepts, cached per concept list"""
+    return _build_automaton(concepts)
+
+
+def _count_matches(automaton: ahocorasick.Automaton, text: str) -> int:
+    """Count how many of the automaton's keywords occur in text"""
+    if len(automaton) == 0:
+        return 0
+    found = dict(value for _, value in automaton.iter(text))
+    return sum(found.values())
+
+
+def _approx_distinct(words: Iterable[str]) -> float:
+    """
+    Approximate distinct-word count from a 256-bit hash bitmap (linear counting).
+    Avoids allocating a set per response; accurate to a few percent for answer-length text.
+    Uses CRC32 rather than hash(), which is salted per process, so scores are reproducible.
+    """
+    mask = 0
+    for word in words:
+        mask |= 1 << (zlib.crc32(word.encode()) & 0xFF)
+    empty = 256 - mask.bit_count()
+    return 256 * math.log(256 / max(empty, 1))
+
+
+# Clarity: Single-word structure markers, checked by set membership
+_CLARITY_MARKERS = frozenset({"first", "second", "finally", "therefore"})
+
+# Depth: Mentions of complexity, edge cases, trade-offs (substring phrases)
+_DEPTH_PHRASES = (
+    "time complexity", "space complexity", "O(n)", "O(log n)",
+    "edge case", "trade-off", "optimize", "however", "depends on"
+)
+_DEPTH_AUTOMATON = _build_automaton(phrase.lower() for phrase in _DEPTH_PHRASES)  # Matched against lowercased text
+
+# Confidence: Feature buckets (searchsorted side="right") and their score deltas.
+# Optimal speaking rate is ~130-170 words per minute; upper bounds are inclusive.
+_RATE_BUCKETS = np.array([100, 130, np.nextafter(170, np.inf), np.nextafter(200, np.inf)])
+_RATE_DELTAS = np.array([0, 1, 2, 1, 0])
+# Some pauses are good (thinking), too many indicate uncertainty
+_PAUSE_BUCKETS = np.array([0.2, 0.4])
+_PAUSE_DELTAS = np.array([2, 1, -1])
+
+# Feedback: (dimension, phrase when score >= 7, phrase when score < 5)
+_FEEDBACK_PHRASES = (
+    ("technical_accuracy", "Good technical understanding demonstrated.", "Review the core concepts for better accuracy."),
+    ("clarity", "Clear and well-structured explanation.", "Try to organize your answer more clearly."),
+    ("depth", "Excellent depth with complexity analysis.", "Consider discussing time/space complexity and edge cases."),
+    ("confidence", None, "Practice speaking at a steady pace.")
+)
+_FEEDBACK_HIGH, _FEEDBACK_LOW = 2, 1  # 2-bit level per dimension
+
+# Feedback text per packed level mask, filled lazily
+_FEEDBACK_CACHE: Dict[int, str] = {}
+
+
+def _feedback_for_mask(mask: int) -> str:
+    """Join the feedback phrases selected by a packed level mask"""
+    feedback_parts = []
+    for i, (_, high_phrase, low_phrase) in enumerate(_FEEDBACK_PHRASES):
+        level = (mask >> (i * 2)) & 3
+        phrase = high_phrase if level == _FEEDBACK_HIGH else low_phrase if level == _FEEDBACK_LOW else None
+        if phrase:
+            feedback_parts.append(phrase)
+    return " ".join(feedback_parts)
+
+
 class EvalService:
     """
     Evaluation service for scoring student responses during viva.
@@ -29,18 +122,20 @@ class EvalService:
     
     def __init__(
         self,
-        model_name: str = "microsoft/deberta-v3-base"
+        model_name: str = "microsoft/deberta-v3-base",
+        onnx_dir: str = "./data/eval_onnx"
     ):
         """
         Initialize the evaluation model.
         
         Args:
             model_name: Base model for fine-tuning/evaluation
+            onnx_dir: Directory for the exported INT8 ONNX model
         """
         self.model_name = model_name
+        self.onnx_dir = onnx_dir
         self.tokenizer: Optional[AutoTokenizer] = None
-        self.model: Optional[AutoModelForSequenceClassification] = None
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.model: Optional[ORTModelForSequenceClassification] = None
         
     def load_model(self):
         """Load the evaluation model"""
@@ -50,12 +145,32 @@ class EvalService:
         
         # For MVP, we'll use a zero-shot approach
         # In Phase 2, this will be fine-tuned on interview data
-        self.model = AutoModelForSequenceClassification.from_pretrained(
-            self.model_name,
-            num_labels=5  # Our 5 scoring dimensions
+        quantized_file = "model_quantized.onnx"
+        if not os.path.exists(os.path.join(self.onnx_dir, quantized_file)):
+            print("⚙️ Exporting evaluation model to INT8 ONNX (first run only)...")
+            config = AutoConfig.from_pretrained(
+                self.model_name,
+                num_labels=5  # Our 5 scoring dimensions
+            )
+            ort_model = ORTModelForSequenceClassification.from_pretrained(
+                self.model_name,
+                config=config,
+                export=True
+            )
+            # Dynamic INT8 quantization targeting VNNI kernels
+            quantizer = ORTQuantizer.from_pretrained(ort_model)
+            quantizer.quantize(
+                save_dir=self.onnx_dir,
+                quantization_config=AutoQuantizationConfig.avx512_vnni(
+                    is_static=False,
+                    per_channel=False
+                )
+            )
+            
+        self.model = ORTModelForSequenceClassification.from_pretrained(
+            self.onnx_dir,
+            file_name=quantized_file
         )
-        self.model.to(self.device)
-        self.model.eval()
         
         print("✅ Evaluation model loaded!")
         
@@ -84,7 +199,7 @@ class EvalService:
         scores = self._heuristic_scoring(
             question=question,
             response=student_response,
-            expected_concepts=expected_concepts or []
+            expected_concepts=tuple(expected_concepts or ())
         )
         
         # Incorporate audio features if available
@@ -92,13 +207,13 @@ class EvalService:
             scores["confidence"] = self._score_confidence(audio_features)
             
         # Calculate overall score
-        overall = np.mean([
-            scores["technical_accuracy"],
-            scores["clarity"],
-            scores["depth"],
-            scores["confidence"],
-            scores["communication"]
-        ])
+        overall = (
+            scores["technical_accuracy"]
+            + scores["clarity"]
+            + scores["depth"]
+            + scores["confidence"]
+            + scores["communication"]
+        ) * 0.2
         
         # Generate feedback
         feedback = self._generate_feedback(scores)
@@ -117,7 +232,7 @@ class EvalService:
         self,
         question: str,
         response: str,
-        expected_concepts: List[str]
+        expected_concepts: Tuple[str, ...]
     ) -> Dict[str, float]:
         """
         Heuristic-based scoring for MVP.
@@ -132,37 +247,35 @@ class EvalService:
         }
         
         response_lower = response.lower()
-        words = response.split()
+        words_lower = response_lower.split()
+        word_count = len(words_lower)
+        if not word_count:
+            return scores
         
         # Technical accuracy: Check for expected concepts
         if expected_concepts:
-            concept_matches = sum(
-                1 for concept in expected_concepts 
-                if concept.lower() in response_lower
+            concept_matches = _count_matches(
+                _concept_automaton(_lower_concepts(expected_concepts)),
+                response_lower
             )
             scores["technical_accuracy"] = min(10, 5 + (concept_matches / len(expected_concepts)) * 5)
             
         # Clarity: Response length and structure
-        if len(words) > 20:
-            scores["clarity"] += 1
-        if len(words) > 50:
-            scores["clarity"] += 1
-        if any(word in response_lower for word in ["first", "second", "finally", "therefore"]):
-            scores["clarity"] += 1
-        scores["clarity"] = min(10, scores["clarity"])
+        clarity_bonus = (
+            (word_count > 20)
+            + (word_count > 50)
+            + (not _CLARITY_MARKERS.isdisjoint(word.strip(string.punctuation) for word in words_lower))
+        )
+        scores["clarity"] = min(10, scores["clarity"] + clarity_bonus)
         
         # Depth: Mentions of complexity, edge cases, trade-offs
-        depth_indicators = [
-            "time complexity", "space complexity", "O(n)", "O(log n)",
-            "edge case", "trade-off", "optimize", "however", "depends on"
-        ]
-        depth_matches = sum(1 for ind in depth_indicators if ind in response_lower)
+        depth_matches = _count_matches(_DEPTH_AUTOMATON, response_lower)
         scores["depth"] = min(10, 5 + depth_matches)
         
         # Communication: Grammar and articulation (basic check)
         if response[0].isupper() and response[-1] in ".!?":
             scores["communication"] += 1
-        if len(set(words)) / len(words) > 0.7:  # Vocabulary variety
+        if _approx_distinct(words_lower) / word_count > 0.7:  # Vocabulary variety
             scores["communication"] += 1
         scores["communication"] = min(10, scores["communication"])
         
@@ -174,48 +287,27 @@ class EvalService:
         base_score = 5.0
         
         if "speaking_rate" in audio_features:
-            # Optimal speaking rate is ~130-170 words per minute
             rate = audio_features["speaking_rate"]
-            if 130 <= rate <= 170:
-                base_score += 2
-            elif 100 <= rate < 130 or 170 < rate <= 200:
-                base_score += 1
-                
+            base_score += _RATE_DELTAS[np.searchsorted(_RATE_BUCKETS, rate, side="right")]
+            
         if "pause_ratio" in audio_features:
-            # Some pauses are good (thinking), too many indicate uncertainty
             ratio = audio_features["pause_ratio"]
-            if ratio < 0.2:
-                base_score += 2
-            elif ratio < 0.4:
-                base_score += 1
-            else:
-                base_score -= 1
+            base_score += _PAUSE_DELTAS[np.searchsorted(_PAUSE_BUCKETS, ratio, side="right")]
                 
-        return min(10, max(0, base_score))
+        return float(min(10, max(0, base_score)))
     
     def _generate_feedback(self, scores: Dict[str, float]) -> str:
         """Generate constructive feedback based on scores"""
-        feedback_parts = []
-        
-        if scores["technical_accuracy"] >= 7:
-            feedback_parts.append("Good technical understanding demonstrated.")
-        elif scores["technical_accuracy"] < 5:
-            feedback_parts.append("Review the core concepts for better accuracy.")
-            
-        if scores["clarity"] >= 7:
-            feedback_parts.append("Clear and well-structured explanation.")
-        elif scores["clarity"] < 5:
-            feedback_parts.append("Try to organize your answer more clearly.")
-            
-        if scores["depth"] >= 7:
-            feedback_parts.append("Excellent depth with complexity analysis.")
-        elif scores["depth"] < 5:
-            feedback_parts.append("Consider discussing time/space complexity and edge cases.")
-            
-        if scores["confidence"] < 5:
-            feedback_parts.append("Practice speaking at a steady pace.")
+        mask = 0
+        for i, (key, _, _) in enumerate(_FEEDBACK_PHRASES):
+            score = scores[key]
+            level = _FEEDBACK_HIGH if score >= 7 else _FEEDBACK_LOW if score < 5 else 0
+            mask |= level << (i * 2)
             
-        return " ".join(feedback_parts)
+        feedback = _FEEDBACK_CACHE.get(mask)
+        if feedback is None:
+            feedback = _FEEDBACK_CACHE[mask] = _feedback_for_mask(mask)
+        return feedback
     
     def evaluate_session(
         self,
@@ -233,25 +325,30 @@ class EvalService:
         if not conversation_history:
             return EvaluationScore(0, 0, 0, 0, 0, 0, "No responses to evaluate")
             
-        all_scores = []
+        # Average all scores in a single pass
+        technical_accuracy = clarity = depth = confidence = communication = 0.0
         
         for exchange in conversation_history:
             score = self.evaluate_response(
                 question=exchange.get("question", ""),
                 student_response=exchange.get("response", "")
             )
-            all_scores.append(score)
+            technical_accuracy += score.technical_accuracy
+            clarity += score.clarity
+            depth += score.depth
+            confidence += score.confidence
+            communication += score.communication
             
-        # Average all scores
+        count = len(conversation_history)
         avg_scores = {
-            "technical_accuracy": np.mean([s.technical_accuracy for s in all_scores]),
-            "clarity": np.mean([s.clarity for s in all_scores]),
-            "depth": np.mean([s.depth for s in all_scores]),
-            "confidence": np.mean([s.confidence for s in all_scores]),
-            "communication": np.mean([s.communication for s in all_scores])
+            "technical_accuracy": technical_accuracy / count,
+            "clarity": clarity / count,
+            "depth": depth / count,
+            "confidence": confidence / count,
+            "communication": communication / count
         }
         
-        overall = np.mean(list(avg_scores.values()))
+        overall = (technical_accuracy + clarity + depth + confidence + communication) / (5 * count)
         
         return EvaluationScore(
             technical_accuracy=round(avg_scores["technical_accuracy"], 1),
@@ -10,7 +10,13 @@ from langchain.memory import ConversationBufferWindowMemory
 from langchain.prompts import PromptTemplate
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import DirectoryLoader, TextLoader, PDFLoader
-from typing import Optional, List, Dict
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.vectorstores import VectorStoreRetriever
+from typing import Optional, List, Dict, AsyncIterator
+import asyncio
+import chromadb
+import random
+import torch
 import os
 
 
@@ -39,6 +45,54 @@ As the professor, respond naturally. You may:
 
 Keep responses concise (2-3 sentences max). Speak like you're in an actual viva."""
 
+# LangChain's default collection name, so existing persisted stores keep loading
+KNOWLEDGE_COLLECTION = "langchain"
+
+# HNSW index settings for a small (~1k chunk) corpus of normalized embeddings
+KNOWLEDGE_HNSW_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:M": 32,
+    "hnsw:construction_ef": 200
+}
+
+INTERVIEWER_PROMPT = PromptTemplate(
+    template=INTERVIEWER_SYSTEM_PROMPT,
+    input_variables=["context", "chat_history", "question"]
+)
+
+# Opening questions to start the interview
+_OPENING_PROMPTS = (
+    "Let's start with something fundamental. Can you explain what a linked list is?",
+    "Tell me about the difference between a stack and a queue.",
+    "Let's begin with arrays. How does dynamic array resizing work?",
+    "Explain to me what time complexity means and why we care about it.",
+    "Start by telling me about binary search trees."
+)
+
+# Opening turn goes straight to the LLM; the opening question already sets the topic
+FIRST_TURN_PROMPT = """You are a senior DSA professor conducting a viva/interview examination.
+Student said: {question}
+Ask a crisp DSA follow-up. Keep it to 2-3 sentences max."""
+
+# Tags the LLM that writes the answer, as opposed to the one condensing the question
+ANSWER_TAG = "interviewer_answer"
+
+
+class _AnswerTokenHandler(AsyncCallbackHandler):
+    """Queues streamed tokens from the answer LLM only"""
+    
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._answer_runs = set()
+        
+    async def on_llm_start(self, serialized, prompts, *, run_id, tags=None, **kwargs):
+        if tags and ANSWER_TAG in tags:
+            self._answer_runs.add(run_id)
+            
+    async def on_llm_new_token(self, token: str, *, run_id, **kwargs):
+        if run_id in self._answer_runs:
+            self.queue.put_nowait(token)
+
 
 class LLMService:
     """
@@ -68,27 +122,44 @@ class LLMService:
         self.persist_dir = persist_dir
         
         self.llm: Optional[Ollama] = None
+        self.condense_llm: Optional[Ollama] = None
         self.embeddings: Optional[HuggingFaceEmbeddings] = None
         self.vectorstore: Optional[Chroma] = None
-        self.chain: Optional[ConversationalRetrievalChain] = None
+        self.retriever: Optional[VectorStoreRetriever] = None
         
-        # Session memories (per interview session)
+        # Session memories and retrieval chains (per interview session)
         self.session_memories: Dict[str, ConversationBufferWindowMemory] = {}
+        self.session_chains: Dict[str, ConversationalRetrievalChain] = {}
+        self.session_first_turn: Dict[str, bool] = {}
         
     def load_model(self):
         """Load the LLM and embedding models"""
         print(f"🧠 Loading LLM ({self.model_name})...")
         
         self.llm = Ollama(
+            model=self.model_name,
+            temperature=0.7,
+            top_p=0.9,
+            tags=[ANSWER_TAG]
+        )
+        # Separate handle so question condensing isn't streamed to the student
+        self.condense_llm = Ollama(
             model=self.model_name,
             temperature=0.7,
             top_p=0.9
         )
         
         print(f"📚 Loading embedding model...")
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        model_kwargs = {"device": device}
+        if device == "cuda":
+            # FP16 halves weight bandwidth for the (memory-bound) MiniLM encoder
+            model_kwargs["model_kwargs"] = {"torch_dtype": torch.float16}
+            
         self.embeddings = HuggingFaceEmbeddings(
             model_name=self.embedding_model,
-            model_kwargs={"device": "cuda"}
+            model_kwargs=model_kwargs,
+            encode_kwargs={"batch_size": 64, "normalize_embeddings": True}
         )
         
         print("✅ Models loaded!")
@@ -134,13 +205,32 @@ class LLMService:
         )
         splits = text_splitter.split_documents(documents)
         
-        # Create vector store
-        self.vectorstore = Chroma.from_documents(
-            documents=splits,
-            embedding=self.embeddings,
-            persist_directory=self.persist_dir
+        # Embed all chunks up front in GPU-sized batches
+        texts = [split.page_content for split in splits]
+        embeddings = self.embeddings.embed_documents(texts)
+        
+        # Create vector store, rebuilding the index from scratch in one bulk insert
+        client = chromadb.PersistentClient(path=self.persist_dir)
+        try:
+            client.delete_collection(KNOWLEDGE_COLLECTION)
+        except Exception:
+            pass  # Nothing to replace on first build
+        collection = client.create_collection(
+            KNOWLEDGE_COLLECTION,
+            metadata=KNOWLEDGE_HNSW_METADATA
+        )
+        collection.add(
+            ids=[f"chunk-{i}" for i in range(len(splits))],
+            embeddings=embeddings,
+            documents=texts,
+            metadatas=[split.metadata for split in splits]
         )
-        self.vectorstore.persist()
+        self.vectorstore = Chroma(
+            client=client,
+            collection_name=KNOWLEDGE_COLLECTION,
+            embedding_function=self.embeddings
+        )
+        self.retriever = self.vectorstore.as_retriever(search_kwargs={"k": 3})
         
         print(f"✅ Knowledge base built with {len(splits)} chunks!")
         
@@ -152,80 +242,87 @@ class LLMService:
         if os.path.exists(self.persist_dir):
             self.vectorstore = Chroma(
                 persist_directory=self.persist_dir,
+                collection_name=KNOWLEDGE_COLLECTION,
                 embedding_function=self.embeddings
             )
+            self.retriever = self.vectorstore.as_retriever(search_kwargs={"k": 3})
             print("✅ Knowledge base loaded!")
         else:
             print("⚠️ No existing knowledge base found. Building new one...")
             self.build_knowledge_base()
             
     def create_session(self, session_id: str):
-        """Create a new conversation session"""
-        self.session_memories[session_id] = ConversationBufferWindowMemory(
+        """Create a new conversation session and its retrieval chain"""
+        assert self.retriever is not None, "Call load_model() and load_knowledge_base() at startup"
+        
+        memory = ConversationBufferWindowMemory(
             k=10,  # Keep last 10 exchanges
             memory_key="chat_history",
             return_messages=True,
             output_key="answer"
         )
+        self.session_memories[session_id] = memory
         
-    def generate_response(
+        # Built once per session instead of on every turn
+        self.session_chains[session_id] = ConversationalRetrievalChain.from_llm(
+            llm=self.llm,
+            condense_question_llm=self.condense_llm,
+            retriever=self.retriever,
+            memory=memory,
+            combine_docs_chain_kwargs={"prompt": INTERVIEWER_PROMPT},
+            return_source_documents=False
+        )
+        self.session_first_turn[session_id] = True
+        
+    async def generate_response(
         self,
         session_id: str,
         user_input: str
-    ) -> str:
+    ) -> AsyncIterator[str]:
         """
-        Generate an interviewer response based on user input.
+        Stream an interviewer response based on user input.
         
         Args:
             session_id: The interview session ID
             user_input: The student's transcribed response
             
-        Returns:
-            The professor's response text
+        Yields:
+            Token deltas of the professor's response text
         """
-        if self.llm is None:
-            self.load_model()
-            
-        if self.vectorstore is None:
-            self.load_knowledge_base()
-            
-        if session_id not in self.session_memories:
+        if session_id not in self.session_chains:
             self.create_session(session_id)
             
-        memory = self.session_memories[session_id]
+        # First turn skips retrieval and question condensing entirely
+        if self.session_first_turn.pop(session_id, False):
+            reply = ""
+            async for token in self.llm.astream(FIRST_TURN_PROMPT.format(question=user_input)):
+                reply += token
+                yield token
+            self.session_memories[session_id].save_context(
+                {"question": user_input},
+                {"answer": reply}
+            )
+            return
+            
+        chain = self.session_chains[session_id]
+        handler = _AnswerTokenHandler()
         
-        # Build the retrieval chain
-        prompt_template = PromptTemplate(
-            template=INTERVIEWER_SYSTEM_PROMPT,
-            input_variables=["context", "chat_history", "question"]
+        # Run the chain in the background and hand tokens over as they arrive
+        task = asyncio.create_task(
+            chain.ainvoke({"question": user_input}, config={"callbacks": [handler]})
         )
+        task.add_done_callback(lambda _: handler.queue.put_nowait(None))
         
-        chain = ConversationalRetrievalChain.from_llm(
-            llm=self.llm,
-            retriever=self.vectorstore.as_retriever(
-                search_kwargs={"k": 3}
-            ),
-            memory=memory,
-            combine_docs_chain_kwargs={"prompt": prompt_template},
-            return_source_documents=False
-        )
-        
-        # Generate response
-        result = chain({"question": user_input})
-        
-        return result["answer"]
+        try:
+            while (token := await handler.queue.get()) is not None:
+                yield token
+            await task  # Surface chain errors
+        finally:
+            task.cancel()
     
     def get_opening_question(self, topic: str = "DSA") -> str:
         """Generate an opening question to start the interview"""
-        opening_prompts = [
-            "Let's start with something fundamental. Can you explain what a linked list is?",
-            "Tell me about the difference between a stack and a queue.",
-            "Let's begin with arrays. How does dynamic array resizing work?",
-            "Explain to me what time complexity means and why we care about it.",
-            "Start by telling me about binary search trees."
-        ]
-        import random
-        return random.choice(opening_prompts)
+        return random.choice(_OPENING_PROMPTS)
     
     def end_session(self, session_id: str) -> List[str]:
         """
@@ -237,5 +334,7 @@ class LLMService:
         if session_id in self.session_memories:
             history = self.session_memories[session_id].chat_memory.messages
             del self.session_memories[session_id]
+            self.session_chains.pop(session_id, None)
+            self.session_first_turn.pop(session_id, None)
             return [msg.content for msg in history]
         return []
@@ -2,9 +2,15 @@
 Speech-to-Text Service using Faster Whisper
 """
 
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, BatchedInferencePipeline
+from faster_whisper.audio import pad_or_trim
+from faster_whisper.tokenizer import Tokenizer
+import ctranslate2
 import numpy as np
-from typing import Optional, Tuple
+from collections import OrderedDict
+from typing import Optional, Tuple, Dict
+import threading
+import time
 import io
 
 
@@ -17,7 +23,10 @@ class STTService:
         self,
         model_size: str = "base",
         device: str = "auto",
-        compute_type: str = "float16"
+        compute_type: Optional[str] = None,
+        batch_size: int = 8,
+        max_streams: int = 64,
+        stream_ttl_seconds: float = 300
     ):
         """
         Initialize the Whisper model.
@@ -25,12 +34,33 @@ class STTService:
         Args:
             model_size: Size of model - tiny, base, small, medium, large-v2, large-v3
             device: "cuda" or "cpu" or "auto"
-            compute_type: "float16", "int8", "float32"
+            compute_type: "int8_float16", "int8", "float16", "float32"
+                (default: int8_float16 on GPU, int8 on CPU)
+            batch_size: Number of VAD segments decoded together by the batched pipeline
+            max_streams: Streaming buffers kept before the least recently used is dropped
+            stream_ttl_seconds: Idle time after which a stream's buffer is dropped
         """
+        if device == "auto":
+            device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+        if compute_type is None:
+            # INT8 weights use CTranslate2's INT8 GEMM kernels on both backends
+            compute_type = "int8_float16" if device == "cuda" else "int8"
+            
         self.model_size = model_size
         self.device = device
         self.compute_type = compute_type
+        self.batch_size = batch_size
         self.model: Optional[WhisperModel] = None
+        self.batched_model: Optional[BatchedInferencePipeline] = None
+        self.tokenizer: Optional[Tokenizer] = None
+        
+        # Rolling log-mel buffers for streaming transcription (per stream),
+        # least recently used first, bounded by count and idle time
+        self.max_streams = max_streams
+        self.stream_ttl_seconds = stream_ttl_seconds
+        self.stream_buffers: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._stream_last_seen: Dict[str, float] = {}
+        self._stream_lock = threading.Lock()
         
     def load_model(self):
         """Load the Whisper model into memory"""
@@ -40,6 +70,14 @@ class STTService:
             device=self.device,
             compute_type=self.compute_type
         )
+        # Reused across calls so VAD segments are decoded in batches
+        self.batched_model = BatchedInferencePipeline(model=self.model)
+        self.tokenizer = Tokenizer(
+            self.model.hf_tokenizer,
+            self.model.model.is_multilingual,
+            task="transcribe",
+            language="en"
+        )
         print("✅ Whisper model loaded!")
         
     def transcribe(
@@ -57,16 +95,16 @@ class STTService:
         Returns:
             Tuple of (transcribed_text, confidence_score)
         """
-        if self.model is None:
-            self.load_model()
+        assert self.model is not None, "Call load_model() at startup"
             
         # Convert bytes to numpy array for faster-whisper
         audio_array = np.frombuffer(audio_data, dtype=np.float32)
         
-        segments, info = self.model.transcribe(
+        segments, info = self.batched_model.transcribe(
             audio_array,
             language=language,
-            beam_size=5,
+            beam_size=1,  # Greedy is enough for logprob-averaged confidence
+            batch_size=self.batch_size,
             vad_filter=True,  # Voice activity detection
             vad_parameters=dict(
                 min_silence_duration_ms=500,
@@ -88,27 +126,68 @@ class STTService:
         
         return full_text.strip(), avg_confidence
     
-    def transcribe_stream(self, audio_chunk: bytes) -> str:
+    def transcribe_stream(self, audio_chunk: bytes, stream_id: str) -> str:
         """
         Transcribe a streaming audio chunk.
         Used for real-time transcription during interview.
         
+        Only the new chunk's log-mel features are computed; they are appended to
+        a rolling buffer (up to Whisper's 30 s window) that is encoded and
+        greedily decoded directly, bypassing transcribe()'s per-call setup.
+        
+        The result is cumulative: each call returns the transcript of everything
+        buffered for the stream so far (not just this chunk), so callers should
+        replace, not append, the text they show. Call reset_stream() when the
+        utterance or session ends.
+        
         Args:
             audio_chunk: Small audio chunk (e.g., 1 second)
+            stream_id: Identifies the stream whose buffer the chunk extends
+                (e.g. the interview session ID)
             
         Returns:
-            Transcribed text for this chunk
+            Transcribed text for the audio buffered so far in this stream
         """
-        if self.model is None:
-            self.load_model()
+        assert self.model is not None, "Call load_model() at startup"
             
         audio_array = np.frombuffer(audio_chunk, dtype=np.float32)
+        features = self.model.feature_extractor(audio_array, padding=0)
         
-        segments, _ = self.model.transcribe(
-            audio_array,
-            language="en",
+        with self._stream_lock:
+            buffer = self.stream_buffers.get(stream_id)
+            if buffer is not None:
+                features = np.concatenate([buffer, features], axis=1)
+            features = features[:, -self.model.feature_extractor.nb_max_frames:]
+            self.stream_buffers[stream_id] = features
+            self.stream_buffers.move_to_end(stream_id)
+            self._stream_last_seen[stream_id] = time.monotonic()
+            self._expire_streams()
+        
+        encoder_output = self.model.encode(pad_or_trim(features))
+        prompt = list(self.tokenizer.sot_sequence) + [self.tokenizer.no_timestamps]
+        result = self.model.model.generate(
+            encoder_output,
+            [prompt],
             beam_size=1,  # Faster for streaming
-            without_timestamps=True
+            max_length=self.model.max_length,
+            suppress_blank=True
         )
         
-        return " ".join(segment.text for segment in segments)
+        return self.tokenizer.decode(result[0].sequences_ids[0]).strip()
+        
+    def _expire_streams(self):
+        """Drop the least recently used buffers past max_streams or idle past the TTL"""
+        now = time.monotonic()
+        while self.stream_buffers:
+            oldest = next(iter(self.stream_buffers))
+            expired = now - self._stream_last_seen[oldest] > self.stream_ttl_seconds
+            if not expired and len(self.stream_buffers) <= self.max_streams:
+                break
+            self.stream_buffers.pop(oldest)
+            del self._stream_last_seen[oldest]
+    
+    def reset_stream(self, stream_id: str):
+        """Discard the buffered audio of a stream (e.g. at the end of an utterance)"""
+        with self._stream_lock:
+            self.stream_buffers.pop(stream_id, None)
+            self._stream_last_seen.pop(stream_id, None)
@@ -2,13 +2,297 @@
 Text-to-Speech Service using Coqui XTTS for voice cloning
 """
 
-from TTS.api import TTS
-from typing import Optional
+from TTS.tts.configs.xtts_config import XttsConfig
+from TTS.tts.models.xtts import Xtts
+from TTS.utils.manage import ModelManager
+from transformers.pytorch_utils import Conv1D
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Literal, Dict, AsyncIterator
+import onnxruntime as ort
+import contextlib
+import functools
+import asyncio
+import hashlib
+import tempfile
+import threading
+import queue
 import numpy as np
+import soundfile as sf
+import torch
+import torchaudio
 import io
 import os
 
 
+# Autocast dtypes for the half-precision modes (CUDA only)
+_AUTOCAST_DTYPES = {"fp16": torch.float16, "bf16": torch.bfloat16}
+
+
+def _float32_bytes(wav) -> bytes:
+    """Raw float32 sample bytes, copying only where a conversion is needed"""
+    if isinstance(wav, torch.Tensor):
+        return wav.detach().to(dtype=torch.float32).contiguous().cpu().numpy().tobytes()
+    return np.asarray(wav, dtype=np.float32).tobytes()
+
+
+class _SamplePool:
+    """Bounded LIFO pool of reusable host sample buffers for streamed chunks"""
+    
+    def __init__(
+        self,
+        min_samples: int,
+        dtype: torch.dtype = torch.int16,
+        pin_memory: bool = False,
+        max_buffers: int = 8
+    ):
+        self.min_samples = min_samples
+        self.dtype = dtype
+        self.pin_memory = pin_memory  # Page-locked so device-to-host copies can be async
+        self._buffers: queue.LifoQueue = queue.LifoQueue(maxsize=max_buffers)
+        
+    def get(self, n: int) -> torch.Tensor:
+        """Return a pooled buffer holding at least n samples, or a new one"""
+        try:
+            buf = self._buffers.get_nowait()
+        except queue.Empty:
+            buf = None
+        if buf is None or buf.numel() < n:
+            buf = torch.empty(max(n, self.min_samples), dtype=self.dtype, pin_memory=self.pin_memory)
+        return buf
+        
+    def put(self, buf: torch.Tensor):
+        """Return a buffer to the pool (dropped if the pool is full)"""
+        try:
+            self._buffers.put_nowait(buf)
+        except queue.Full:
+            pass
+
+
+def _write_wav_atomic(path: str, audio_bytes: bytes):
+    """Write a file via a unique temp file and rename, so readers never see a partial WAV"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(audio_bytes)
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Only this write's own temp file; concurrent writes to the same path use others
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def _on_wav_written(path: str, future):
+    """Done-callback for background WAV writes: report failures"""
+    error = future.exception()
+    if error is not None:
+        print(f"❌ Failed to write audio file {path}: {error}")
+
+
+# Exported decoders and built TensorRT engines, per model
+_TRT_CACHE_DIR = os.path.expanduser("~/.cache/tts_trt")
+
+# TensorRT optimization profile for the decoder's latent sequence length
+_TRT_LATENT_SHAPES = {
+    "trt_profile_min_shapes": "latents:1x1x1024,g:1x512x1",
+    "trt_profile_opt_shapes": "latents:1x200x1024,g:1x512x1",
+    "trt_profile_max_shapes": "latents:1x1024x1024,g:1x512x1"
+}
+
+
+class _OrtHifiganDecoder(torch.nn.Module):
+    """
+    Drop-in replacement for Xtts.hifigan_decoder backed by an ONNX Runtime session.
+    Decodes round-trip through host memory (latents in, samples out) even on the
+    CUDA/TensorRT providers, a known cost that IO binding could remove.
+    """
+    
+    def __init__(self, session: ort.InferenceSession, speaker_encoder: torch.nn.Module):
+        super().__init__()
+        self.session = session
+        # Xtts.get_speaker_embedding reaches the speaker encoder through the decoder
+        self.speaker_encoder = speaker_encoder
+        
+    def forward(self, latents: torch.Tensor, g: Optional[torch.Tensor] = None) -> torch.Tensor:
+        wav = self.session.run(["wav"], {
+            "latents": latents.detach().float().cpu().numpy(),
+            "g": g.detach().float().cpu().numpy()
+        })[0]
+        return torch.from_numpy(wav).to(latents.device)
+
+
+def _export_hifigan_decoder(model: Xtts, onnx_path: str):
+    """Export XTTS's HiFi-GAN decoder to ONNX with a dynamic latent length"""
+    latents = torch.randn(1, 32, model.args.gpt_n_model_channels, device=model.device)
+    g = torch.randn(1, model.args.d_vector_dim, 1, device=model.device)
+    torch.onnx.export(
+        model.hifigan_decoder,
+        (latents, g),
+        onnx_path,
+        input_names=["latents", "g"],
+        output_names=["wav"],
+        dynamic_axes={"latents": {1: "seq_len"}, "wav": {2: "samples"}},
+        opset_version=17
+    )
+
+
+class _CompiledDecoder(torch.nn.Module):
+    """HiFi-GAN decoder compiled with torch.compile(mode="reduce-overhead")"""
+    
+    def __init__(self, decoder: torch.nn.Module):
+        super().__init__()
+        self.compiled = torch.compile(decoder, mode="reduce-overhead")
+        # Xtts.get_speaker_embedding reaches the speaker encoder through the decoder
+        self.speaker_encoder = decoder.speaker_encoder
+        
+    def forward(self, latents: torch.Tensor, g: Optional[torch.Tensor] = None) -> torch.Tensor:
+        # reduce-overhead replays CUDA graphs whose outputs the next call overwrites, while
+        # inference_stream keeps a view of the previous output to cross-fade chunks
+        return self.compiled(latents, g=g).clone()
+
+
+class _CudaGraphDecoder(torch.nn.Module):
+    """
+    Replays a captured CUDA graph of the HiFi-GAN decoder per input shape.
+    Streaming decodes latents in multiples of the chunk size, so those shapes repeat
+    across sentences and are captured; other lengths (the last decode of each
+    sentence, whole-utterance synthesis) are one-offs and run eagerly.
+    """
+    
+    def __init__(self, decoder: torch.nn.Module, bucket: int, max_graphs: int = 32):
+        super().__init__()
+        self.decoder = decoder
+        self.bucket = bucket  # Only latent lengths divisible by this are captured
+        self.max_graphs = max_graphs
+        self._graphs: Dict[tuple, tuple] = {}
+        self._pool = None  # Memory pool shared by every captured graph (replays never overlap)
+        # Xtts.get_speaker_embedding reaches the speaker encoder through the decoder
+        self.speaker_encoder = decoder.speaker_encoder
+        
+    def _capture(self, latents: torch.Tensor, g: torch.Tensor) -> tuple:
+        """Capture one decode into a graph with static input and output buffers"""
+        static_latents, static_g = latents.clone(), g.clone()
+        
+        # Re-enter the caller's autocast without the cast cache: cached half-precision
+        # weight copies are freed when that context exits, but the graph keeps reading them
+        autocast = contextlib.nullcontext()
+        if torch.is_autocast_enabled():
+            autocast = torch.autocast(
+                device_type="cuda", dtype=torch.get_autocast_gpu_dtype(), cache_enabled=False
+            )
+            
+        with autocast:
+            # Warm up on a side stream so lazy allocations aren't captured
+            side_stream = torch.cuda.Stream()
+            side_stream.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(side_stream):
+                self.decoder(static_latents, g=static_g)
+            torch.cuda.current_stream().wait_stream(side_stream)
+            
+            if self._pool is None:
+                self._pool = torch.cuda.graph_pool_handle()
+            graph = torch.cuda.CUDAGraph()
+            with torch.cuda.graph(graph, pool=self._pool):
+                static_wav = self.decoder(static_latents, g=static_g)
+        return static_latents, static_g, static_wav, graph
+        
+    def forward(self, latents: torch.Tensor, g: Optional[torch.Tensor] = None) -> torch.Tensor:
+        autocast_dtype = torch.get_autocast_gpu_dtype() if torch.is_autocast_enabled() else None
+        key = (tuple(latents.shape), latents.dtype, tuple(g.shape), autocast_dtype)
+        entry = self._graphs.get(key)
+        if entry is None:
+            if latents.shape[1] % self.bucket or len(self._graphs) >= self.max_graphs:
+                return self.decoder(latents, g=g)  # One-off length, or past the cap: run eagerly
+            entry = self._graphs[key] = self._capture(latents, g)
+            
+        static_latents, static_g, static_wav, graph = entry
+        static_latents.copy_(latents)
+        static_g.copy_(g)
+        graph.replay()
+        return static_wav.clone()  # The next replay overwrites the static output
+        
+        
+def _quantized_linear(layer: torch.nn.Module, mode: str) -> torch.nn.Module:
+    """Build a bitsandbytes int8 / NF4 copy of an nn.Linear or GPT-2 Conv1D layer"""
+    # Imported here: bitsandbytes is CUDA-only and not needed unless quantizing
+    import bitsandbytes as bnb
+    
+    if isinstance(layer, Conv1D):
+        # GPT-2's Conv1D stores its weight transposed: (in_features, out_features)
+        in_features, out_features = layer.weight.shape
+        weight = layer.weight.t()
+    else:
+        out_features, in_features = layer.weight.shape
+        weight = layer.weight
+    weight = weight.detach().half().cpu().contiguous()
+    has_bias = layer.bias is not None
+    
+    if mode == "int8":
+        quantized = bnb.nn.Linear8bitLt(
+            in_features, out_features, bias=has_bias, has_fp16_weights=False, threshold=6.0
+        )
+        quantized.weight = bnb.nn.Int8Params(weight, requires_grad=False, has_fp16_weights=False)
+    else:
+        quantized = bnb.nn.Linear4bit(
+            in_features, out_features, bias=has_bias, compute_dtype=torch.float16, quant_type="nf4"
+        )
+        quantized.weight = bnb.nn.Params4bit(weight, requires_grad=False, quant_type="nf4")
+    if has_bias:
+        quantized.bias = torch.nn.Parameter(layer.bias.detach().half().cpu(), requires_grad=False)
+        
+    # Weights are quantized when the module is moved to the GPU
+    return quantized.to(layer.weight.device)
+
+
+def _quantize_gpt(model: Xtts, mode: str):
+    """Swap the linear layers of XTTS's GPT-2 transformer for quantized ones in place"""
+    for module in list(model.gpt.gpt.modules()):
+        for name, child in list(module.named_children()):
+            if isinstance(child, (torch.nn.Linear, Conv1D)):
+                setattr(module, name, _quantized_linear(child, mode))
+                
+                
+# Precomputed speaker conditioning and resampled reference audio, keyed by hashes of the audio
+_VOICE_CACHE_DIR = os.path.expanduser("~/.cache/tts/voices")
+
+# XTTS computes conditioning from mono 22.05 kHz audio, capped at this many seconds
+_REFERENCE_SAMPLE_RATE = 22050
+_MAX_REFERENCE_SECONDS = 60
+
+
+# GPT tokens per streamed chunk, and a pooled buffer size that fits one
+# (~1024 output samples per token at 24 kHz, with headroom)
+_STREAM_CHUNK_SIZE = 20
+_POOL_BUFFER_SAMPLES = 32768
+
+
+# Loaded models shared by every TTSService in the process (speaker latents stay per instance)
+_MODEL_CACHE: Dict[tuple, Xtts] = {}
+_MODEL_LOCKS: Dict[tuple, threading.Lock] = {}  # One per cache key, held while loading
+_MODEL_LOCKS_LOCK = threading.Lock()
+
+
+def _model_lock(key: tuple) -> threading.Lock:
+    """Return the lock serializing loads of one cache key (other keys load in parallel)"""
+    with _MODEL_LOCKS_LOCK:
+        return _MODEL_LOCKS.setdefault(key, threading.Lock())
+
+# One inference thread per device, shared like the models, so concurrent requests
+# queue in order instead of interleaving Python overhead on the same GPU
+_INFERENCE_EXECUTORS: Dict[str, ThreadPoolExecutor] = {}
+_INFERENCE_EXECUTORS_LOCK = threading.Lock()  # Never held across model loads
+
+
+def _inference_executor(device: str) -> ThreadPoolExecutor:
+    """Return the single-worker inference executor for a device, creating it on first use"""
+    with _INFERENCE_EXECUTORS_LOCK:
+        if device not in _INFERENCE_EXECUTORS:
+            _INFERENCE_EXECUTORS[device] = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f"tts-{device}"
+            )
+        return _INFERENCE_EXECUTORS[device]
+
+
 class TTSService:
     """
     Text-to-Speech service using Coqui XTTS v2 for voice cloning.
@@ -18,7 +302,12 @@ class TTSService:
     def __init__(
         self,
         model_name: str = "tts_models/multilingual/multi-dataset/xtts_v2",
-        reference_audio_path: Optional[str] = None
+        reference_audio_path: Optional[str] = None,
+        precision: Literal["fp32", "fp16", "bf16"] = "fp16",
+        backend: Literal["torch", "onnx", "tensorrt"] = "torch",
+        enable_compile: bool = True,
+        use_cuda_graphs: bool = True,
+        quantize: Literal["none", "int8", "nf4"] = "none"
     ):
         """
         Initialize the TTS model.
@@ -26,21 +315,169 @@ class TTSService:
         Args:
             model_name: The Coqui TTS model to use
             reference_audio_path: Path to the professor's voice recording for cloning
+            precision: Inference precision on GPU (CPU always runs FP32)
+            backend: Runtime for the HiFi-GAN decoder; "onnx" and "tensorrt" run an
+                exported graph through ONNX Runtime (the GPT decoder stays in PyTorch)
+            enable_compile: torch.compile the HiFi-GAN decoder (CUDA, torch backend only)
+            use_cuda_graphs: Replay captured CUDA graphs for the HiFi-GAN decoder when it
+                isn't compiled (reduce-overhead compilation already uses CUDA graphs)
+            quantize: bitsandbytes weight quantization for the GPT decoder (CUDA only);
+                the HiFi-GAN decoder is never quantized
         """
         self.model_name = model_name
         self.reference_audio_path = reference_audio_path
-        self.tts: Optional[TTS] = None
+        self.precision = precision
+        self.backend = backend
+        self.enable_compile = enable_compile and backend == "torch" and torch.cuda.is_available()
+        self.use_cuda_graphs = (
+            use_cuda_graphs and not self.enable_compile
+            and backend == "torch" and torch.cuda.is_available()
+        )
+        self.quantize = quantize if torch.cuda.is_available() else "none"
+        self.model: Optional[Xtts] = None
+        self.sample_rate = 24000
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        
+        self._pool = _SamplePool(
+            min_samples=_POOL_BUFFER_SAMPLES,
+            dtype=torch.int16,
+            pin_memory=self.device == "cuda"
+        )
+        self._stream: Optional[torch.cuda.Stream] = None  # Dedicated inference stream (CUDA)
+        self._io_pool = ThreadPoolExecutor(max_workers=2)  # Background WAV file writes
+        
+        # Speaker conditioning, computed once per reference audio
+        self.gpt_cond_latent: Optional[torch.Tensor] = None
+        self.speaker_embedding: Optional[torch.Tensor] = None
         
     def load_model(self):
-        """Load the XTTS model"""
+        """Load the XTTS model, reusing one already loaded in this process"""
+        key = self._cache_key()
+        with _model_lock(key):
+            if key not in _MODEL_CACHE:
+                _MODEL_CACHE[key] = self._load_xtts()
+            self.model = _MODEL_CACHE[key]
+        self.sample_rate = self.model.config.audio.output_sample_rate
+        if self.device == "cuda":
+            self._stream = torch.cuda.Stream()
+        
+        if self.reference_audio_path is not None:
+            if os.path.exists(self.reference_audio_path):
+                self.set_reference_audio(self.reference_audio_path)
+            else:
+                print(f"⚠️ Reference audio not found: {self.reference_audio_path}")
+                self.reference_audio_path = None
+                
+    async def load_model_async(self):
+        """Load the model in a worker thread so startup doesn't block the event loop"""
+        await asyncio.to_thread(self.load_model)
+        
+    def _cache_key(self) -> tuple:
+        """Settings that change the loaded weights or modules"""
+        # Precision shapes TensorRT engines and compiled/captured decoders (GPU only)
+        precision = self.precision if self.device == "cuda" else "fp32"
+        return (
+            self.model_name, self.device, self.backend, precision,
+            self.enable_compile, self.use_cuda_graphs, self.quantize
+        )
+        
+    def _load_xtts(self) -> Xtts:
+        """Read the XTTS weights from disk and prepare them for inference"""
         print(f"🔊 Loading XTTS voice cloning model...")
-        self.tts = TTS(self.model_name)
+        model_dir, _, _ = ModelManager().download_model(self.model_name)
+        
+        config = XttsConfig()
+        config.load_json(os.path.join(model_dir, "config.json"))
+        model = Xtts.init_from_config(config)
+        model.load_checkpoint(config, checkpoint_dir=model_dir, eval=True)
         
         # Move to GPU if available
-        if self.tts.is_multi_gpu:
-            self.tts.to("cuda")
+        model.to(self.device)
+        if self.device == "cuda":
+            # Let FP32 matmuls run on TF32 tensor cores (Ampere+)
+            torch.set_float32_matmul_precision("high")
+            torch.backends.cuda.matmul.allow_tf32 = True
+            
+        if self.quantize != "none":
+            print(f"⚙️ Quantizing GPT decoder to {self.quantize}...")
+            _quantize_gpt(model, self.quantize)
+            
+        if self.backend != "torch":
+            model.hifigan_decoder = self._load_ort_decoder(model)
+            
+        if self.enable_compile:
+            self._compile_decoder(model)
+        elif self.use_cuda_graphs:
+            model.hifigan_decoder = _CudaGraphDecoder(model.hifigan_decoder, bucket=_STREAM_CHUNK_SIZE)
             
         print("✅ XTTS model loaded!")
+        return model
+        
+    def _load_ort_decoder(self, model: Xtts) -> _OrtHifiganDecoder:
+        """Export the HiFi-GAN decoder once and load it into an ONNX Runtime session"""
+        cache_dir = os.path.join(
+            _TRT_CACHE_DIR,
+            hashlib.sha256(self.model_name.encode()).hexdigest()[:16]
+        )
+        onnx_path = os.path.join(cache_dir, "hifigan_decoder.onnx")
+        
+        if not os.path.exists(onnx_path):
+            print("⚙️ Exporting HiFi-GAN decoder to ONNX (first run only)...")
+            os.makedirs(cache_dir, exist_ok=True)
+            _export_hifigan_decoder(model, onnx_path)
+            
+        providers = ["CUDAExecutionProvider", "CPUExecutionProvider"]
+        if self.backend == "tensorrt":
+            # Built engines are cached so only the first boot pays the TRT build
+            providers.insert(0, ("TensorrtExecutionProvider", {
+                "trt_engine_cache_enable": True,
+                "trt_engine_cache_path": cache_dir,
+                "trt_fp16_enable": self.precision == "fp16",
+                **_TRT_LATENT_SHAPES
+            }))
+            
+        session = ort.InferenceSession(onnx_path, providers=providers)
+        return _OrtHifiganDecoder(session, model.hifigan_decoder.speaker_encoder)
+        
+    def _compile_decoder(self, model: Xtts):
+        """
+        Compile the HiFi-GAN decoder with a dynamic latent length and warm it up on
+        the device's inference thread. Inductor keeps reduce-overhead CUDA graphs in
+        thread-local state, so only calls made on that thread (synthesize_async,
+        synthesize_stream_async) reuse the warmed graphs for 20..200-token latents;
+        other lengths, or calls from other threads, record a new graph on first use.
+        """
+        print("⚙️ Compiling HiFi-GAN decoder...")
+        model.hifigan_decoder = _CompiledDecoder(model.hifigan_decoder)
+        _inference_executor(self.device).submit(self._warm_up_decoder, model).result()
+        
+    def _warm_up_decoder(self, model: Xtts):
+        """Run the decoder on the latent lengths streaming produces"""
+        g = torch.zeros(1, model.args.d_vector_dim, 1, device=self.device)
+        with torch.inference_mode(), self._autocast():
+            for length in range(_STREAM_CHUNK_SIZE, 10 * _STREAM_CHUNK_SIZE + 1, _STREAM_CHUNK_SIZE):
+                latents = torch.zeros(1, length, model.args.gpt_n_model_channels, device=self.device)
+                torch._dynamo.mark_dynamic(latents, 1)
+                model.hifigan_decoder(latents, g=g)
+                
+    def _autocast(self):
+        """Autocast context for inference: half precision on GPU, FP32 otherwise"""
+        if self.device == "cuda" and self.precision in _AUTOCAST_DTYPES:
+            return torch.autocast(device_type="cuda", dtype=_AUTOCAST_DTYPES[self.precision])
+        return contextlib.nullcontext()
+        
+    def _stream_context(self):
+        """Run queued GPU work on the service's dedicated CUDA stream, if any"""
+        if self._stream is not None:
+            return torch.cuda.stream(self._stream)
+        return contextlib.nullcontext()
+        
+    def _speaker_conditioning(self):
+        """Speaker latents on the inference device, moved there on first use"""
+        if self.gpt_cond_latent.device.type != self.device:
+            self.gpt_cond_latent = self.gpt_cond_latent.to(self.device)
+            self.speaker_embedding = self.speaker_embedding.to(self.device)
+        return self.gpt_cond_latent, self.speaker_embedding
         
     def set_reference_audio(self, audio_path: str):
         """
@@ -52,9 +489,63 @@ class TTSService:
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"Reference audio not found: {audio_path}")
             
+        with open(audio_path, "rb") as f:
+            audio_data = f.read()
+        audio_key = hashlib.sha256(audio_data).hexdigest()[:16]
+        # Latents depend on the speaker encoder too, so the model is part of their key
+        latents_key = hashlib.sha256(self.model_name.encode() + audio_data).hexdigest()[:16]
+        cache_path = os.path.join(_VOICE_CACHE_DIR, f"{latents_key}.pt")
+        
+        if os.path.exists(cache_path):
+            # Warm start: skip the speaker encoder entirely
+            cached = torch.load(cache_path)
+            gpt_cond_latent, speaker_embedding = cached["gpt"], cached["spk"]
+        else:
+            assert self.model is not None, "Call load_model() at startup"
+            
+            # Run the speaker encoder once instead of on every synthesis call
+            audio = self._load_reference_wav(audio_path, audio_key).to(self.model.device)
+            with torch.inference_mode():
+                speaker_embedding = self.model.get_speaker_embedding(audio, _REFERENCE_SAMPLE_RATE)
+                gpt_cond_latent = self.model.get_gpt_cond_latents(
+                    audio, _REFERENCE_SAMPLE_RATE, length=30, chunk_length=6
+                )
+            gpt_cond_latent, speaker_embedding = gpt_cond_latent.cpu(), speaker_embedding.cpu()
+            os.makedirs(_VOICE_CACHE_DIR, exist_ok=True)
+            torch.save({"gpt": gpt_cond_latent, "spk": speaker_embedding}, cache_path)
+            
+        # Kept on the CPU until the first synthesis moves them to the model's device
+        self.gpt_cond_latent = gpt_cond_latent
+        self.speaker_embedding = speaker_embedding
+        
         self.reference_audio_path = audio_path
         print(f"🎙️ Reference audio set: {audio_path}")
         
+    def _load_reference_wav(self, audio_path: str, audio_key: str) -> torch.Tensor:
+        """
+        Load reference audio as validated mono 22.05 kHz samples, decoding and
+        resampling only the first time a given recording is seen.
+        
+        Returns:
+            Audio tensor of shape (1, samples) on the CPU
+        """
+        cache_path = os.path.join(_VOICE_CACHE_DIR, f"{audio_key}.wav.pt")
+        if os.path.exists(cache_path):
+            return torch.load(cache_path)
+            
+        audio, sample_rate = torchaudio.load(audio_path)
+        audio = audio.mean(dim=0, keepdim=True)
+        if sample_rate != _REFERENCE_SAMPLE_RATE:
+            audio = torchaudio.functional.resample(audio, sample_rate, _REFERENCE_SAMPLE_RATE)
+        audio = audio[:, :_REFERENCE_SAMPLE_RATE * _MAX_REFERENCE_SECONDS].clamp(-1, 1)
+        
+        if audio.numel() == 0 or not audio.abs().max() > 0:
+            raise ValueError(f"Reference audio is empty or silent: {audio_path}")
+            
+        os.makedirs(_VOICE_CACHE_DIR, exist_ok=True)
+        torch.save(audio, cache_path)
+        return audio
+        
     def synthesize(
         self,
         text: str,
@@ -66,69 +557,138 @@ class TTSService:
         
         Args:
             text: The text to convert to speech
-            output_path: Optional path to save the audio file
+            output_path: Optional path to save the audio file (written in the background)
             language: Language code
             
         Returns:
             Audio data as bytes
         """
-        if self.tts is None:
-            self.load_model()
+        assert self.model is not None, "Call load_model() at startup"
             
-        if self.reference_audio_path is None:
+        if self.gpt_cond_latent is None:
             raise ValueError("Reference audio not set. Call set_reference_audio() first.")
         
-        # Generate speech with voice cloning
+        # Generate speech from the cached speaker conditioning
+        gpt_cond_latent, speaker_embedding = self._speaker_conditioning()
+        with self._autocast():
+            wav = self.model.inference(
+                text,
+                language,
+                gpt_cond_latent,
+                speaker_embedding,
+                temperature=0.7
+            )["wav"]
+        
         if output_path:
-            self.tts.tts_to_file(
-                text=text,
-                file_path=output_path,
-                speaker_wav=self.reference_audio_path,
-                language=language
-            )
+            # Encode the WAV once in memory; the file write happens off the request path
+            buffer = io.BytesIO()
+            # Autocast leaves fp16 samples, which soundfile rejects
+            samples = np.asarray(wav, dtype=np.float32)
+            sf.write(buffer, samples, self.sample_rate, format="WAV", subtype="PCM_16")
+            audio_bytes = buffer.getvalue()
             
-            # Read the file and return bytes
-            with open(output_path, "rb") as f:
-                return f.read()
-        else:
-            # Generate to memory
-            wav = self.tts.tts(
-                text=text,
-                speaker_wav=self.reference_audio_path,
-                language=language
-            )
-            
-            # Convert numpy array to bytes
-            audio_bytes = np.array(wav, dtype=np.float32).tobytes()
+            write = self._io_pool.submit(_write_wav_atomic, output_path, audio_bytes)
+            write.add_done_callback(functools.partial(_on_wav_written, output_path))
             return audio_bytes
+        else:
+            return _float32_bytes(wav)
     
+    async def synthesize_async(
+        self,
+        text: str,
+        output_path: Optional[str] = None,
+        language: str = "en"
+    ) -> bytes:
+        """Async variant of synthesize, run on the device's inference thread"""
+        loop = asyncio.get_running_loop()
+        executor = _inference_executor(self.device)
+        return await loop.run_in_executor(executor, self.synthesize, text, output_path, language)
+        
     def synthesize_stream(self, text: str, language: str = "en"):
         """
         Stream synthesis for real-time audio generation.
-        Yields audio chunks as they're generated.
+        Yields audio chunks as they're generated, without waiting for whole sentences.
         
         Args:
             text: Text to synthesize
             language: Language code
             
         Yields:
-            Audio chunks as bytes
+            Audio chunks as 16-bit little-endian PCM bytes
         """
-        if self.tts is None:
-            self.load_model()
+        assert self.model is not None, "Call load_model() at startup"
             
-        if self.reference_audio_path is None:
+        if self.gpt_cond_latent is None:
             raise ValueError("Reference audio not set.")
             
-        # Split text into sentences for faster streaming
-        sentences = text.replace(".", ".|").replace("?", "?|").replace("!", "!|").split("|")
+        # XTTS yields decoded audio every stream_chunk_size GPT tokens and
+        # splits long text into sentences internally
+        gpt_cond_latent, speaker_embedding = self._speaker_conditioning()
+        chunks = self.model.inference_stream(
+            text,
+            language,
+            gpt_cond_latent,
+            speaker_embedding,
+            stream_chunk_size=_STREAM_CHUNK_SIZE,
+            overlap_wav_len=1024,
+            enable_text_splitting=True
+        )
         
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if sentence:
-                wav = self.tts.tts(
-                    text=sentence,
-                    speaker_wav=self.reference_audio_path,
-                    language=language
-                )
-                yield np.array(wav, dtype=np.float32).tobytes()
+        if self._stream is not None:
+            self._stream.wait_stream(torch.cuda.current_stream())  # Latents moved on the default stream
+            
+        # Autocast and the stream are entered per step: the generator may be resumed
+        # from another thread, and both are thread-local
+        while True:
+            with self._autocast(), self._stream_context():
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                    
+                # Quantize to int16 PCM on the device so only half the bytes cross to the host,
+                # then copy asynchronously into a reused pinned buffer
+                pcm = (chunk.detach().reshape(-1).clamp(-1, 1) * 32767).to(torch.int16)
+                n = pcm.numel()
+                buf = self._pool.get(n)
+                buf[:n].copy_(pcm, non_blocking=True)
+                
+            # Wait only for this stream's work before reading the host buffer
+            if self._stream is not None:
+                self._stream.synchronize()
+            audio_bytes = buf[:n].numpy().tobytes()
+            self._pool.put(buf)
+            yield audio_bytes
+    
+    async def synthesize_stream_async(self, text: str, language: str = "en") -> AsyncIterator[bytes]:
+        """
+        Async variant of synthesize_stream for use on the event loop.
+        XTTS runs on the device's inference thread and hands chunks over through a queue.
+        
+        Args:
+            text: Text to synthesize
+            language: Language code
+            
+        Yields:
+            Audio chunks as 16-bit little-endian PCM bytes
+        """
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        
+        def produce():
+            try:
+                for chunk in self.synthesize_stream(text, language):
+                    if stop.is_set():
+                        break  # Consumer went away (e.g. client disconnected)
+                    loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+            finally:
+                loop.call_soon_threadsafe(chunks.put_nowait, None)
+                
+        producer = loop.run_in_executor(_inference_executor(self.device), produce)
+        
+        try:
+            while (chunk := await chunks.get()) is not None:
+                yield chunk
+            await producer  # Surface synthesis errors
+        finally:
+            stop.set()
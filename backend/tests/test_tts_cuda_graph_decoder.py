@@ -0,0 +1,96 @@
+"""
+Tests for the CUDA-graph HiFi-GAN decoder wrapper, with CUDA mocked out
+"""
+
+import contextlib
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("TTS")
+
+from services import tts_service
+from services.tts_service import _CudaGraphDecoder
+
+
+class _FakeDecoder(torch.nn.Module):
+    """Stands in for XTTS's HiFi-GAN decoder and counts its forward calls"""
+    
+    def __init__(self):
+        super().__init__()
+        self.speaker_encoder = torch.nn.Identity()
+        self.calls = 0
+        
+    def forward(self, latents, g=None):
+        self.calls += 1
+        return latents.sum(dim=-1, keepdim=True)
+
+
+class _FakeGraph:
+    def replay(self):
+        pass
+
+
+@pytest.fixture
+def fake_cuda(monkeypatch):
+    """Replace the CUDA graph/stream APIs with no-ops and record capture pools"""
+    pools = []
+    
+    @contextlib.contextmanager
+    def fake_graph(graph, pool=None):
+        pools.append(pool)
+        yield
+        
+    class FakeStream:
+        def wait_stream(self, stream):
+            pass
+            
+    monkeypatch.setattr(tts_service.torch.cuda, "Stream", FakeStream)
+    monkeypatch.setattr(tts_service.torch.cuda, "current_stream", FakeStream)
+    monkeypatch.setattr(tts_service.torch.cuda, "stream", lambda stream: contextlib.nullcontext())
+    monkeypatch.setattr(tts_service.torch.cuda, "CUDAGraph", _FakeGraph)
+    monkeypatch.setattr(tts_service.torch.cuda, "graph", fake_graph)
+    monkeypatch.setattr(tts_service.torch.cuda, "graph_pool_handle", object)
+    return pools
+
+
+def _decode(wrapper, length):
+    latents = torch.ones(1, length, 4)
+    g = torch.zeros(1, 2, 1)
+    return wrapper(latents, g=g)
+
+
+def test_only_bucketed_lengths_are_captured(fake_cuda):
+    wrapper = _CudaGraphDecoder(_FakeDecoder(), bucket=20, max_graphs=2)
+    
+    # One-off lengths run eagerly and don't spend the cap
+    for length in (7, 33, 41, 59, 101):
+        _decode(wrapper, length)
+    assert wrapper._graphs == {}
+    
+    _decode(wrapper, 20)
+    _decode(wrapper, 40)
+    assert sorted(key[0][1] for key in wrapper._graphs) == [20, 40]
+    
+    # Past the cap, new bucketed lengths fall back to eager too
+    _decode(wrapper, 60)
+    assert len(wrapper._graphs) == 2
+
+
+def test_captures_share_one_memory_pool(fake_cuda):
+    wrapper = _CudaGraphDecoder(_FakeDecoder(), bucket=20)
+    _decode(wrapper, 20)
+    _decode(wrapper, 40)
+    
+    assert len(fake_cuda) == 2
+    assert fake_cuda[0] is not None and fake_cuda[0] is fake_cuda[1]
+
+
+def test_replay_returns_a_copy_of_the_static_output(fake_cuda):
+    wrapper = _CudaGraphDecoder(_FakeDecoder(), bucket=20)
+    first = _decode(wrapper, 20)
+    second = _decode(wrapper, 20)
+    
+    assert wrapper.decoder.calls == 2  # Warmup + capture; the second call only replays
+    assert first.data_ptr() != second.data_ptr()
+    assert torch.equal(first, second)